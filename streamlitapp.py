@@ -1,6 +1,8 @@
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
 import pandas as pd
+import html
+from concurrent.futures import ThreadPoolExecutor
 
 # --------------------------------------------------
 # Page Setup
@@ -10,7 +12,11 @@ st.set_page_config(
     layout="wide"
 )
 
-session = get_active_session()
+@st.cache_resource
+def get_session():
+    return get_active_session()
+
+session = get_session()
 
 st.title("🏠 INSPECTRA")
 st.markdown(
@@ -20,23 +26,117 @@ st.markdown(
 st.divider()
 
 # --------------------------------------------------
-# Helper: Load Data Safely
+# Helper: Load Data (cached across reruns, shared read-only)
+# --------------------------------------------------
+def load_df(query, params=None):
+    # Arrow-backed columns skip the numpy conversion copy and keep NUMBER widths
+    df = session.sql(query, params=params).to_arrow().to_pandas(
+        types_mapper=pd.ArrowDtype, self_destruct=True
+    )
+    # Scores fit in small ints; ids and labels repeat, so store them as categories
+    for col in df.select_dtypes("integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in ("PROPERTY_ID", "ROOM_TYPE", "RISK_LEVEL"):
+        if col in df:
+            df[col] = df[col].astype("category")
+    return df
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_properties():
+    # Indexed by id so per-property lookups are hash lookups, not column scans
+    property_df = load_df(
+        "SELECT PROPERTY_ID, RISK_LEVEL, TOTAL_RISK FROM INSPECTRA_DB.CORE.PROPERTY_RISK"
+    ).set_index("PROPERTY_ID", drop=False)
+    # Built with the frame so the chart always matches it and reruns reuse it
+    trend = property_df.assign(
+        INSPECTION_DATE=pd.date_range(
+            end=pd.Timestamp.today().normalize(), periods=len(property_df)
+        )
+    ).set_index("INSPECTION_DATE")["TOTAL_RISK"]
+    return property_df, trend, pd.Timestamp.now()
+
+# loaded_at ties these entries to one load of the property list, so a reloaded
+# list never pairs with per-property rows cached before it
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_for_property(property_id, loaded_at):
+    params = [property_id]
+    queries = [
+        # Summary and bank signal are joined server-side into a single row.
+        # If the joins fan out, the most cautious bank decision wins.
+        """
+        SELECT p.PROPERTY_ID,
+               s.SUMMARY_TEXT,
+               s.PROPERTY_ID IS NOT NULL AS HAS_SUMMARY,
+               b.BANK_DECISION,
+               b.PROPERTY_ID IS NOT NULL AS HAS_BANK_SIGNAL
+        FROM INSPECTRA_DB.CORE.PROPERTY_RISK p
+        LEFT JOIN INSPECTRA_DB.CORE.PROPERTY_SUMMARY s ON s.PROPERTY_ID = p.PROPERTY_ID
+        LEFT JOIN INSPECTRA_DB.CORE.BANK_RISK_VIEW b ON b.PROPERTY_ID = p.PROPERTY_ID
+        WHERE p.PROPERTY_ID = ?
+        ORDER BY CASE b.BANK_DECISION
+                     WHEN 'LOAN_REJECT' THEN 0
+                     WHEN 'MANUAL_REVIEW' THEN 1
+                     ELSE 2
+                 END,
+                 b.BANK_DECISION,
+                 s.SUMMARY_TEXT
+        LIMIT 1
+        """,
+        "SELECT * FROM INSPECTRA_DB.CORE.ROOM_RISK WHERE PROPERTY_ID = ?",
+        # Image columns are optional, so the gallery fills in absent ones
+        "SELECT * FROM INSPECTRA_DB.CORE.ROOM_IMAGES WHERE PROPERTY_ID = ?",
+    ]
+    # Concurrent queries are only safe when the server has enabled thread-safe
+    # sessions (PYTHON_SNOWPARK_ENABLE_THREAD_SAFE_SESSION, off by default).
+    # Otherwise every thread would share one cursor, so run them in sequence.
+    # The flag is private Snowpark API, so a missing attribute means sequential.
+    connection = getattr(session, "_conn", None)
+    if getattr(connection, "_thread_safe_session_enabled", False):
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            return tuple(pool.map(lambda query: load_df(query, params), queries))
+    return tuple(load_df(query, params) for query in queries)
+
+def refresh_data():
+    load_properties.clear()
+    load_for_property.clear()
+
+# --------------------------------------------------
+# Helper: Report Text
 # --------------------------------------------------
-def load_df(query):
-    try:
-        return session.sql(query).to_pandas()
-    except Exception as e:
-        st.error(f"Data load failed: {e}")
-        return pd.DataFrame()
+# str and bytes are immutable, so the resource cache can hand out the same
+# objects to every rerun and session instead of unpickling fresh copies
+@st.cache_resource(max_entries=1000, show_spinner=False)
+def build_report(property_id, risk_level, total_risk, rooms_inspected, confidence):
+    report_text = f"""
+PROPERTY ID: {property_id}
+
+OVERALL RISK LEVEL: {risk_level}
+TOTAL RISK SCORE: {total_risk}
+
+INSPECTION COVERAGE:
+- Rooms inspected: {rooms_inspected}
+- Confidence level: {confidence}
+
+KEY AI FINDINGS:
+- High-risk rooms detected
+- Electrical/damp issues identified
+- Structural safety evaluated using transparent thresholds
+
+RECOMMENDATION:
+Immediate corrective inspection advised for high-risk rooms.
+Preventive maintenance recommended for medium-risk rooms.
+"""
+    return report_text, report_text.encode("utf-8")
 
 # --------------------------------------------------
-# Load Core Tables
+# Load Property Index
 # --------------------------------------------------
-property_df = load_df("SELECT * FROM INSPECTRA_DB.CORE.PROPERTY_RISK")
-room_df = load_df("SELECT * FROM INSPECTRA_DB.CORE.ROOM_RISK")
-summary_df = load_df("SELECT * FROM INSPECTRA_DB.CORE.PROPERTY_SUMMARY")
-image_df = load_df("SELECT * FROM INSPECTRA_DB.CORE.ROOM_IMAGES")
-bank_df = load_df("SELECT * FROM INSPECTRA_DB.CORE.BANK_RISK_VIEW")
+# Failures raise out of the cached loaders so they are never cached.
+try:
+    property_df, trend, loaded_at = load_properties()
+except Exception as e:
+    st.error(f"Data load failed: {e}")
+    st.stop()
 
 if property_df.empty:
     st.warning("No inspection data available yet.")
@@ -46,18 +146,29 @@ if property_df.empty:
 # Sidebar Controls
 # --------------------------------------------------
 st.sidebar.header("Inspection Settings")
+st.sidebar.button("🔄 Refresh data", on_click=refresh_data)
 focus = st.sidebar.selectbox(
     "Inspection Focus",
     ["Overall", "Structural", "Electrical", "Finishing"]
 )
-only_high_risk = st.sidebar.checkbox("Highlight only high-risk rooms")
 
 # --------------------------------------------------
 # Property Selection
 # --------------------------------------------------
 st.subheader("Select Property")
-property_id = st.selectbox("Property ID", property_df["PROPERTY_ID"].unique())
-property_row = property_df[property_df["PROPERTY_ID"] == property_id].iloc[0]
+property_id = st.selectbox("Property ID", property_df["PROPERTY_ID"].unique().tolist())
+property_row = property_df.loc[[property_id]].iloc[0]
+
+try:
+    dashboard_df, room_df, image_df = load_for_property(property_id, loaded_at)
+except Exception as e:
+    st.error(f"Data load failed: {e}")
+    st.stop()
+
+# The cached property list can outlive a property deleted upstream
+if dashboard_df.empty:
+    st.warning("This property is no longer available. Use Refresh data to reload the list.")
+    st.stop()
 
 # --------------------------------------------------
 # Key Metrics
@@ -67,72 +178,77 @@ c1, c2, c3 = st.columns(3)
 c1.metric("Risk Level", property_row["RISK_LEVEL"])
 c2.metric("Total Risk Score", int(property_row["TOTAL_RISK"]))
 
-rooms_inspected = room_df[room_df["PROPERTY_ID"] == property_id].shape[0]
+rooms_inspected = room_df.shape[0]
 confidence = "High" if rooms_inspected >= 3 else "Medium"
 c3.metric("Inspection Confidence", confidence)
 st.divider()
 
 # --------------------------------------------------
-# Room-wise Risk Breakdown
-# --------------------------------------------------
-st.subheader("Room-wise Risk Distribution")
-room_view = room_df[room_df["PROPERTY_ID"] == property_id]
+# Room Sections
+# --------------------------------------------------
+# A fragment, so toggling the room filter reruns only these sections
+@st.fragment
+def room_section(room_df):
+    # --------------------------------------------------
+    # Room-wise Risk Breakdown
+    # --------------------------------------------------
+    st.subheader("Room-wise Risk Distribution")
+    only_high_risk = st.checkbox("Highlight only high-risk rooms")
+    room_view = room_df
 
-if only_high_risk:
-    room_view = room_view[room_view["ROOM_RISK_SCORE"] >= 60]
+    if only_high_risk:
+        room_view = room_view[room_view["ROOM_RISK_SCORE"] >= 60]
 
-st.caption("Risk score per room based on observed inspection findings.")
-st.bar_chart(room_view.set_index("ROOM_TYPE")["ROOM_RISK_SCORE"])
-st.dataframe(room_view, use_container_width=True)
-st.divider()
+    st.caption("Risk score per room based on observed inspection findings.")
+    st.bar_chart(room_view.set_index("ROOM_TYPE")["ROOM_RISK_SCORE"])
+    st.dataframe(room_view, use_container_width=True)
+    st.divider()
 
-# --------------------------------------------------
-# Room Risk Heatmap (Simplified)
-# --------------------------------------------------
-st.subheader("🌡️ Room Risk Heatmap")
-heatmap_df = room_view.copy()
-# Map colors (just for display in the table)
-heatmap_df["RISK_LEVEL"] = heatmap_df["ROOM_RISK_SCORE"].apply(
-    lambda x: "High" if x >= 80 else ("Medium" if x >= 60 else ("Low" if x >= 30 else "Safe"))
-)
-st.dataframe(heatmap_df[["ROOM_TYPE", "ROOM_RISK_SCORE", "RISK_LEVEL"]], use_container_width=True)
-st.divider()
+    # --------------------------------------------------
+    # Room Risk Heatmap + Explainable AI Panel
+    # --------------------------------------------------
+    st.subheader("🧠 Explainable AI – Room Risk Heatmap & Reasoning")
+    st.caption(
+        "AI reasoning shows which defects contributed to risk scores. "
+        "Transparent and auditor-friendly."
+    )
+    # Risk buckets are kept off room_view so the raw breakdown above shows
+    # the source columns only
+    xai_view = room_view.assign(
+        RISK_LEVEL=pd.cut(
+            room_view["ROOM_RISK_SCORE"],
+            bins=[-float("inf"), 30, 60, 80, float("inf")],
+            labels=["Safe", "Low", "Medium", "High"],
+            right=False,
+        )
+    )
+    xai_view = xai_view.assign(
+        REASON=xai_view["RISK_LEVEL"].map({
+            "High": "Severe structural or safety defect",
+            "Medium": "Electrical hazard or dampness detected",
+            "Low": "Minor maintenance or finishing issue",
+            "Safe": "No significant defects found",
+        }),
+        GUIDANCE=xai_view["RISK_LEVEL"].map({
+            "High": "High-confidence safety risk",
+            "Medium": "Moderate risk, attention advised",
+            "Low": "Low risk, routine maintenance suggested",
+            "Safe": "Room appears safe",
+        }),
+    )
+    st.dataframe(
+        xai_view,
+        column_order=["ROOM_TYPE", "ROOM_RISK_SCORE", "RISK_LEVEL", "REASON", "GUIDANCE"],
+        column_config={
+            "ROOM_RISK_SCORE": st.column_config.ProgressColumn(
+                "ROOM_RISK_SCORE", min_value=0, max_value=100, format="%d"
+            ),
+        },
+        use_container_width=True
+    )
+    st.divider()
 
-# --------------------------------------------------
-# Explainable AI Panel
-# --------------------------------------------------
-st.subheader("🧠 Explainable AI – Room-Level Risk Reasoning")
-st.caption(
-    "AI reasoning shows which defects contributed to risk scores. "
-    "Transparent and auditor-friendly."
-)
-for _, row in room_view.iterrows():
-    score = row["ROOM_RISK_SCORE"]
-    if score >= 80:
-        reason = "Severe structural or safety defect"
-        severity = "HIGH"
-    elif score >= 60:
-        reason = "Electrical hazard or dampness detected"
-        severity = "MEDIUM"
-    elif score >= 30:
-        reason = "Minor maintenance or finishing issue"
-        severity = "LOW"
-    else:
-        reason = "No significant defects found"
-        severity = "SAFE"
-
-    with st.expander(f"🚪 {row['ROOM_TYPE']}"):
-        st.markdown(f"**Room Risk Score:** {score}")
-        st.markdown(f"**AI Explanation:** {reason}")
-        if severity == "HIGH":
-            st.error("High-confidence safety risk")
-        elif severity == "MEDIUM":
-            st.warning("Moderate risk, attention advised")
-        elif severity == "LOW":
-            st.info("Low risk, routine maintenance suggested")
-        else:
-            st.success("Room appears safe")
-st.divider()
+room_section(room_df)
 
 # --------------------------------------------------
 # Inspection Coverage
@@ -147,8 +263,10 @@ st.divider()
 # Plain-Language Summary
 # --------------------------------------------------
 st.subheader("Plain-Language Inspection Summary")
-summary_text = summary_df[summary_df["PROPERTY_ID"] == property_id]["SUMMARY_TEXT"].iloc[0]
-if property_row["RISK_LEVEL"] == "HIGH":
+summary_text = dashboard_df.at[0, "SUMMARY_TEXT"]
+if not dashboard_df.at[0, "HAS_SUMMARY"]:
+    st.info("No inspection summary recorded for this property")
+elif property_row["RISK_LEVEL"] == "HIGH":
     st.error(summary_text)
 elif property_row["RISK_LEVEL"] == "MEDIUM":
     st.warning(summary_text)
@@ -160,29 +278,17 @@ st.divider()
 # AI-Generated Report (TXT)
 # --------------------------------------------------
 st.subheader("🤖 AI-Generated Inspection Report")
-report_text = f"""
-PROPERTY ID: {property_id}
-
-OVERALL RISK LEVEL: {property_row['RISK_LEVEL']}
-TOTAL RISK SCORE: {property_row['TOTAL_RISK']}
-
-INSPECTION COVERAGE:
-- Rooms inspected: {rooms_inspected}
-- Confidence level: {confidence}
-
-KEY AI FINDINGS:
-- High-risk rooms detected
-- Electrical/damp issues identified
-- Structural safety evaluated using transparent thresholds
-
-RECOMMENDATION:
-Immediate corrective inspection advised for high-risk rooms.
-Preventive maintenance recommended for medium-risk rooms.
-"""
+report_text, report_bytes = build_report(
+    property_id,
+    property_row["RISK_LEVEL"],
+    property_row["TOTAL_RISK"],
+    rooms_inspected,
+    confidence,
+)
 st.text_area("Preview (Explainable AI Output)", report_text, height=260)
 st.download_button(
     "📥 Download AI Inspection Report (TXT)",
-    data=report_text,
+    data=report_bytes,
     file_name=f"{property_id}_AI_Inspection_Report.txt",
     mime="text/plain"
 )
@@ -206,21 +312,43 @@ st.divider()
 # AI Vision Findings (Images)
 # --------------------------------------------------
 st.subheader("🖼️ Detected Defects (Sample Images)")
-img_view = image_df[image_df["PROPERTY_ID"] == property_id]
-cols = st.columns(3)
-for i, (_, row) in enumerate(img_view.iterrows()):
-    with cols[i % 3]:
-        st.image(row.get("IMAGE_URL","https://via.placeholder.com/200"))
-        st.caption(f"{row['ROOM_TYPE']} – {row.get('DEFECT_LABEL','Unknown')} (Confidence: {int(row.get('DEFECT_CONFIDENCE',0)*100)}%)")
+def image_column(name, default):
+    if name not in image_df:
+        return pd.Series(default, index=image_df.index)
+    return image_df[name].fillna(default)
+
+img_view = image_df.assign(
+    URL=image_column("IMAGE_URL", "https://via.placeholder.com/200"),
+    LABEL=image_column("DEFECT_LABEL", "Unknown"),
+    PCT=(image_column("DEFECT_CONFIDENCE", 0) * 100).astype("int16"),
+)
+# Native lazy loading: off-screen images are fetched only when scrolled into view
+cells = []
+for row in img_view.itertuples(index=False):
+    caption = f"{row.ROOM_TYPE} – {row.LABEL} (Confidence: {row.PCT}%)"
+    cells.append(
+        f'<div><img src="{html.escape(row.URL)}" loading="lazy" decoding="async" style="max-width:100%"/>'
+        f'<div style="font-size:0.875rem;opacity:0.6">{html.escape(caption)}</div></div>'
+    )
+st.markdown(
+    '<div style="display:grid;grid-template-columns:repeat(3,1fr);gap:1rem">'
+    + "".join(cells)
+    + "</div>",
+    unsafe_allow_html=True
+)
 st.divider()
 
 # --------------------------------------------------
 # Bank / Mortgage Signal
 # --------------------------------------------------
 st.subheader("🏦 Bank / Mortgage Risk Signal")
-bank_row = bank_df[bank_df["PROPERTY_ID"] == property_id].iloc[0]
-decision = bank_row.get("BANK_DECISION","MANUAL_REVIEW")
-if decision == "LOAN_REJECT":
+decision = dashboard_df.at[0, "BANK_DECISION"]
+if pd.isna(decision):
+    # A NULL decision matches no branch and falls through to approval, as before
+    decision = ""
+if not dashboard_df.at[0, "HAS_BANK_SIGNAL"]:
+    st.warning("No bank risk signal recorded for this property")
+elif decision == "LOAN_REJECT":
     st.error("Loan not recommended due to safety risks")
 elif decision == "MANUAL_REVIEW":
     st.warning("Manual review required")
@@ -232,9 +360,7 @@ st.divider()
 # Risk Trend Over Time
 # --------------------------------------------------
 st.subheader("📉 Risk Trend Over Time")
-trend_df = property_df.copy()
-trend_df["INSPECTION_DATE"] = pd.date_range(end=pd.Timestamp.today(), periods=len(trend_df))
-st.line_chart(trend_df.set_index("INSPECTION_DATE")["TOTAL_RISK"])
+st.line_chart(trend)
 st.divider()
 
 # --------------------------------------------------